@@ -1,8 +1,16 @@
-import xml.etree.ElementTree as ET
+import lxml.etree as ET
 from typing import Optional, List
 from enum import Enum
-from geopy.distance import great_circle
+import math
+import numpy as np
+from numba import njit
+from scipy.spatial import cKDTree
 import argparse
+import logging
+import multiprocessing
+import sys
+
+logger = logging.getLogger(__name__)
 
 
 # Enum of types of sign that should be considered
@@ -12,8 +20,21 @@ class SignType(Enum):
     YIELD = 2
 
 
+# Enum of fixes that can be made to a sign
+class FixType(Enum):
+    NONE = 0  # Sign is left as is
+    SKIPPED = 1  # Sign is skipped because it can't be fixed
+    ALLWAY_STOP = 2
+    DIRECTION_ON_ONEWAY = 3
+    DIRECTION_NEAR_INTERSECTION = 4
+
+
+# Fix for a sign: node id, type of fix and (key, value) of the tag to add
+SignFix = tuple[int, FixType, Optional[tuple[str, str]]]
+
+
 # These are the road types that should be considered for stop signs
-ROAD_TYPES = [
+ROAD_TYPES = frozenset({
     'motorway',
     'motorway_link',
     'trunk',
@@ -28,14 +49,110 @@ ROAD_TYPES = [
     'residential',
     'living_street',
     'service'
-]
+})
+
+# Direction of travel for values of the oneway tag: 1 = forward, -1 = backward
+# Any other value (including oneway=no) is treated as a two-way road
+ONEWAY_VALUES = {
+    'yes': 1,
+    'true': 1,
+    '1': 1,
+    '-1': -1,
+    'reverse': -1
+}
+
+# Compiled XPath query for stop and yield sign nodes
+SIGN_NODES = ET.XPath("node[tag[@k='highway'][@v='stop' or @v='give_way']]")
+# Compiled XPath query for stop and yield sign nodes which are already fixed
+FIXED_SIGN_NODES = ET.XPath(
+    "node[tag[@k='highway'][@v='stop' or @v='give_way']][tag[@k='direction'] or tag[@k='stop'][@v='all']]"
+)
+
+# Mean radius of the earth, used for great circle distances
+EARTH_RADIUS = 6371009  # meters
+
+# Approximate distance checks (the equirectangular pre-filter in nearest_idx
+# and the k-d tree search radius from search_radius) keep points up to this
+# factor further away than the threshold, so that only the exact haversine
+# distance decides whether a point is within the threshold
+DISTANCE_MARGIN = 1.01
+
+
+# Great circle distance in meters between two points
+@njit(fastmath=True, cache=True)
+def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    lat1 = math.radians(lat1)
+    lat2 = math.radians(lat2)
+    dlat = lat2 - lat1
+    dlon = math.radians(lon2 - lon1)
+    a = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(math.sqrt(a))
+
+
+# Convert coordinates in degrees to 3D points in meters on a sphere the size of
+# the earth, so straight line distances between them are the same everywhere
+def sphere_points(lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    lat = np.radians(lats)
+    lon = np.radians(lons)
+    cos_lat = np.cos(lat)
+    return EARTH_RADIUS * np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=1)
+
+
+# Radius in meters for searching points from sphere_points() which are within
+# a great circle distance of each other. Points a great circle distance d apart
+# are a straight line (chord) distance of 2R sin(d / 2R) apart anywhere on the
+# sphere, so this finds every point within the distance, plus DISTANCE_MARGIN.
+def search_radius(distance: float) -> float:
+    return 2 * EARTH_RADIUS * math.sin(distance * DISTANCE_MARGIN / (2 * EARTH_RADIUS))
+
+
+# Find the nearest of an array of points to a point, ignoring points further
+# than max_distance meters away. Returns the index of the nearest point and its
+# distance in meters, or (-1, -1.0) if there is no point within max_distance.
+@njit(fastmath=True, cache=True)
+def nearest_idx(lat0: float, lon0: float, lats: np.ndarray, lons: np.ndarray,
+                max_distance: float) -> tuple[int, float]:
+    # Rule out far away points with an equirectangular approximation first.
+    # This is much cheaper than haversine and accurate enough over short
+    # distances, so allow DISTANCE_MARGIN for the approximation.
+    meters_per_degree = math.radians(EARTH_RADIUS)
+    x_scale = math.cos(math.radians(lat0)) * meters_per_degree
+    max_squared = (max_distance * DISTANCE_MARGIN) ** 2
+    closest = -1
+    min_distance = -1.0
+    for i in range(len(lats)):
+        dx = (lons[i] - lon0) * x_scale
+        dy = (lats[i] - lat0) * meters_per_degree
+        if dx * dx + dy * dy >= max_squared:
+            continue
+        distance = haversine(lat0, lon0, lats[i], lons[i])
+        if closest == -1 or distance < min_distance:
+            closest = i
+            min_distance = distance
+    return closest, min_distance
 
 
 class StopSignFixer:
     input_file: Optional[str] = None
     output_file: Optional[str] = None
 
-    tree: Optional[ET.ElementTree] = None
+    tree: Optional[ET._ElementTree] = None
+
+    # Index of node id -> parent ways, built once in load()
+    node_to_ways: dict[int, list[ET._Element]]
+    # Index of node id -> node element, built once in load()
+    node_by_id: dict[int, ET._Element]
+    # Coordinates of nodes, stored as arrays indexed by node_index[node id]
+    node_index: dict[int, int]
+    node_lats: np.ndarray
+    node_lons: np.ndarray
+    # Cache of way -> {key: value} of its tags, filled in on first access
+    way_tags: dict[ET._Element, dict[str, str]]
+    # Spatial index of intersections (nodes on two or more roads), built once in load()
+    intersection_ids: np.ndarray
+    intersection_tree: Optional[cKDTree]
+    # Index of sign node id -> ids of intersections near the sign
+    nearby_intersections: dict[int, set[int]]
 
     allway_stop_count = 0  # Number of all-way stop signs added
     direction_on_oneway_count = 0  # Number of direction=forward/backward tags added to one-way roads
@@ -49,40 +166,112 @@ class StopSignFixer:
     def __init__(self, input_file: str, output_file: str):
         self.input_file = input_file
         self.output_file = output_file
+        self.node_to_ways = {}
+        self.node_by_id = {}
+        self.way_tags = {}
+        self.node_index = {}
+        self.node_lats = np.empty(0)
+        self.node_lons = np.empty(0)
+        self.intersection_ids = np.empty(0, dtype=np.int64)
+        self.intersection_tree = None
+        self.nearby_intersections = {}
 
     def load(self):
+        # Build the node and way indexes while the file is being parsed,
+        # rather than walking the finished tree again afterwards.
+        # Elements are not cleared because save() writes the whole tree back out.
+        node_by_id: dict[int, ET._Element] = {}
+        node_index: dict[int, int] = {}
+        lats: List[float] = []
+        lons: List[float] = []
+        node_to_ways: dict[int, list[ET._Element]] = {}
         try:
-            tree = ET.parse(self.input_file)
+            context = ET.iterparse(self.input_file, events=('end',), tag=('node', 'way'))
+            for _, elem in context:
+                if elem.tag == 'node':
+                    node_id = int(elem.get('id'))
+                    node_by_id[node_id] = elem
+                    lat = elem.get('lat')
+                    if lat is not None:
+                        node_index[node_id] = len(lats)
+                        lats.append(float(lat))
+                        lons.append(float(elem.get('lon')))
+                else:
+                    for nd in elem.iterfind('nd'):
+                        parent_ways = node_to_ways.setdefault(int(nd.get('ref')), [])
+                        # Closed ways reference their first node twice
+                        if not parent_ways or parent_ways[-1] is not elem:
+                            parent_ways.append(elem)
         except IOError:
-            print("Error reading file")
+            logger.error("Error reading file")
+            return
+        self.tree = context.root.getroottree()
+        self.node_by_id = node_by_id
+        self.node_index = node_index
+        self.node_lats = np.array(lats, dtype=np.float64)
+        self.node_lons = np.array(lons, dtype=np.float64)
+        self.node_to_ways = node_to_ways
+        self.way_tags = {}
+        self.nearby_intersections = {}
+        self.build_intersection_index()
+
+    # Build a k-d tree of all intersections so that intersections near signs
+    # can be found without checking every node of every way
+    def build_intersection_index(self) -> None:
+        intersection_ids = [
+            node_id for node_id, ways in self.node_to_ways.items()
+            if node_id in self.node_index and len(self.filter_parent_ways(ways)) >= 2
+        ]
+        self.intersection_ids = np.array(intersection_ids, dtype=np.int64)
+        if len(intersection_ids) == 0:
+            self.intersection_tree = None
             return
-        self.tree = tree
+        rows = np.array([self.node_index[i] for i in intersection_ids], dtype=np.intp)
+        self.intersection_tree = cKDTree(sphere_points(self.node_lats[rows], self.node_lons[rows]))
+
+    # Get the ids of intersections near each of the given nodes
+    def find_nearby_intersections(self, node_ids: List[int]) -> dict[int, set[int]]:
+        if self.intersection_tree is None or len(node_ids) == 0:
+            return {node_id: set() for node_id in node_ids}
+        rows = np.array([self.node_index[i] for i in node_ids], dtype=np.intp)
+        points = sphere_points(self.node_lats[rows], self.node_lons[rows])
+        # nearest_idx does the exact distance check on the result
+        neighbours = self.intersection_tree.query_ball_point(
+            points, r=search_radius(self.INTERSECTION_THRESHOLD)
+        )
+        return {
+            node_id: set(self.intersection_ids[indexes].tolist())
+            for node_id, indexes in zip(node_ids, neighbours)
+        }
 
     # Get all parent ways of a node
-    def find_parent_ways(self, node_id: int) -> list[ET.Element]:
+    def find_parent_ways(self, node_id: int) -> list[ET._Element]:
         if self.tree is None:
             raise Exception("No tree loaded")
 
-        parent_ways = self.tree.findall(f'way/nd[@ref="{node_id}"]/..')
-        return parent_ways
+        return self.node_to_ways.get(node_id, [])
 
-    @staticmethod
-    def filter_parent_ways(ways: list[ET.Element]) -> list[ET.Element]:
+    # Get tags of a way as a dict, scanning its <tag> elements only once
+    def get_way_tags(self, way: ET._Element) -> dict[str, str]:
+        tags = self.way_tags.get(way)
+        if tags is None:
+            tags = {tag.get('k'): tag.get('v') for tag in way.iterfind('tag')}
+            self.way_tags[way] = tags
+        return tags
+
+    def filter_parent_ways(self, ways: list[ET._Element]) -> list[ET._Element]:
         filtered_ways = []
         for way in ways:
-            for tag in way.findall('tag'):
-                if tag.attrib['k'] == 'highway' and tag.attrib['v'] in ROAD_TYPES:
-                    filtered_ways.append(way)
-                    break
+            if self.get_way_tags(way).get('highway') in ROAD_TYPES:
+                filtered_ways.append(way)
         return filtered_ways
 
     @staticmethod
-    def mark_as_all_way_stop(node: ET.Element) -> None:
-        node.attrib['action'] = 'modify'
+    def mark_as_all_way_stop(node: ET._Element) -> None:
+        node.set('action', 'modify')
         stop_tag = ET.SubElement(node, 'tag')
-        stop_tag.attrib['k'] = 'stop'
-        stop_tag.attrib['v'] = 'all'
-        node.insert(0, stop_tag)
+        stop_tag.set('k', 'stop')
+        stop_tag.set('v', 'all')
 
     @staticmethod
     def print_sign_type(sign_type: SignType) -> str:
@@ -93,8 +282,8 @@ class StopSignFixer:
         else:
             return "none"
 
-    # Process a single stop or yield sign
-    def process_sign(self, node_id: int, sign_type: SignType) -> None:
+    # Work out how to fix a single stop or yield sign without changing the tree
+    def find_fix(self, node_id: int, sign_type: SignType) -> SignFix:
         if self.tree is None:
             raise Exception("No tree loaded")
 
@@ -103,28 +292,18 @@ class StopSignFixer:
         # If there are no parent ways, stop sign is disconnected from rest of map
         # This is probably an error
         if len(ways) == 0:
-            self.skipped_count += 1
-            print(f"Warning: node {node_id} has no parent ways")
-            return
+            logger.warning("Warning: node %d has no parent ways", node_id)
+            return node_id, FixType.SKIPPED, None
         filtered_ways = self.filter_parent_ways(ways)
 
         # Count # of parent ways with highway tag
-        highway_count = 0
-        for way in filtered_ways:
-            has_highway_tag = False
-            for tag in way.findall('tag'):
-                if tag.attrib['k'] == 'highway' and tag.attrib['v'] in ROAD_TYPES:
-                    has_highway_tag = True
-                    break
-            if has_highway_tag:
-                highway_count += 1
+        highway_count = len(filtered_ways)
 
         # If highway_count == 0, stop sign is not on a road
         # Might be on a footway or cycleway - we don't care about these
         if highway_count == 0:
-            self.skipped_count += 1
-            print(f"Warning: node {node_id} is not on a road")
-            return
+            logger.warning("Warning: node %d is not on a road", node_id)
+            return node_id, FixType.SKIPPED, None
         # For stop sign only:
         # If highway_count >= 2, mark as all-way stop
         if sign_type == SignType.STOP and highway_count >= 2:
@@ -133,150 +312,171 @@ class StopSignFixer:
             # Check if name is the same for both ways
             # If so we will generate a warning
             if highway_count == 2:
-                name_same = False
+                names = []
                 for way in filtered_ways:
-                    name = None
-                    for tag in way.findall('tag'):
-                        if tag.attrib['k'] == 'name':
-                            name = tag.attrib['v']
-                            break
+                    name = self.get_way_tags(way).get('name')
                     if name is not None:
-                        for way2 in filtered_ways:
-                            if way2 == way:
-                                continue
-                            name2 = None
-                            for tag in way2.findall('tag'):
-                                if tag.attrib['k'] == 'name':
-                                    name2 = tag.attrib['v']
-                                    break
-                            if name2 is not None and name == name2:
-                                name_same = True
+                        names.append(name)
+                name_same = len(set(names)) < len(names)
                 if name_same:
-                    self.skipped_count += 1
-                    print(f"Warning: node {node_id} is on a road split into two ways with the same name")
-                    return
-            node = self.tree.find(f'node[@id="{node_id}"]')
-            self.mark_as_all_way_stop(node)
-            self.allway_stop_count += 1
-            print(f"Marked node {node_id} as all-way stop")
+                    logger.warning("Warning: node %d is on a road split into two ways with the same name", node_id)
+                    return node_id, FixType.SKIPPED, None
+            return node_id, FixType.ALLWAY_STOP, ('stop', 'all')
         # If highway_count == 1, we are on a road where we probably want to add
         # direction=forward and direction=backward to the stop or yield sign.
         if highway_count == 1:
-            print(f"Processing node {node_id} with {self.print_sign_type(sign_type)} sign")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Processing node {node_id} with {self.print_sign_type(sign_type)} sign")
             way = ways[0]  # Get parent way
             # If we are at the end of the way
             # We do not want to add direction=forward or direction=backward
             # because there is no road after the sign
             ways_nodes: List[int] = []
             for nd in way.findall('nd'):
-                ways_nodes.append(int(nd.attrib['ref']))
-            index = ways_nodes.index(node_id)
-            if index == 0 or index == len(ways_nodes) - 1:
-                print(f"Warning: node {node_id} is at the end of a way")
-                return
+                ways_nodes.append(int(nd.get('ref')))
+            sign_index = ways_nodes.index(node_id)
+            if sign_index == 0 or sign_index == len(ways_nodes) - 1:
+                logger.warning("Warning: node %d is at the end of a way", node_id)
+                return node_id, FixType.NONE, None
 
             # Check if road is one-way
             # If so we will always want to add direction=forward
             # (or direction=backward if the road is oneway=-1)
-            oneway = 0
-            for tag in way.findall('tag'):
-                if tag.attrib['k'] == 'oneway':
-                    if tag.attrib['v'] == 'yes':
-                        oneway = 1
-                    elif tag.attrib['v'] == '-1':
-                        oneway = -1
+            oneway = ONEWAY_VALUES.get(self.get_way_tags(way).get('oneway'), 0)
             if oneway != 0:
-                node = self.tree.find(f'node[@id="{node_id}"]')
-                node.attrib['action'] = 'modify'
-                direction_tag = ET.SubElement(node, 'tag')
-                direction_tag.attrib['k'] = 'direction'
                 if oneway == 1:
                     tag = 'forward'
                 else:
                     tag = 'backward'
-                direction_tag.attrib['v'] = tag
-                self.direction_on_oneway_count += 1
-                print(f"Added direction={tag} to node {node_id}")
-                return
-            node = self.tree.find(f'node[@id="{node_id}"]')
+                return node_id, FixType.DIRECTION_ON_ONEWAY, ('direction', tag)
             # Get latitude and longitude of sign
-            lat = float(node.attrib['lat'])
-            lon = float(node.attrib['lon'])
-            sign_lat_lon = (lat, lon)
+            sign_row = self.node_index[node_id]
+            sign_lat = self.node_lats[sign_row]
+            sign_lon = self.node_lons[sign_row]
             # If road is not one-way, we want to check distance to see
             # how far we are from the nearest intersection
             # If we are close to an intersection, we will want to add
             # direction=forward or direction=backward
-            min_distance: Optional[int] = None
-            closest_node_id: Optional[int] = None
-            # Check to see if any roads are connected to that way
-            for way_node_id in ways_nodes:
-                # If node is the node with the sign, skip it
-                if way_node_id == node_id:
-                    continue
-                # Get all roads connected to this node
-                connected_ways = self.find_parent_ways(way_node_id)
-                connected_ways = self.filter_parent_ways(connected_ways)
-                # If there are no connected ways, skip this node
-                if len(connected_ways) == 0:
-                    continue
-                # Get lat and lon of intersection
-                lat = float(self.tree.find(f'node[@id="{way_node_id}"]').attrib['lat'])
-                lon = float(self.tree.find(f'node[@id="{way_node_id}"]').attrib['lon'])
-                intersection_lat_lon = (lat, lon)
-                # Calculate distance between sign and intersection
-                distance = great_circle(sign_lat_lon, intersection_lat_lon).meters
-                if min_distance is None or distance < min_distance:
+            min_distance: Optional[float] = None
+            closest_index: Optional[int] = None
+            # Check to see if any intersections near the sign are on that way
+            nearby = self.nearby_intersections.get(node_id)
+            if nearby is None:
+                nearby = self.find_nearby_intersections([node_id])[node_id]
+            # Remember the index of each intersection in parent way
+            intersection_indexes: List[int] = []
+            intersection_ids: List[int] = []
+            for i, way_node_id in enumerate(ways_nodes):
+                if way_node_id != node_id and way_node_id in nearby:
+                    intersection_indexes.append(i)
+                    intersection_ids.append(way_node_id)
+            if len(intersection_ids) > 0:
+                # Calculate distance between sign and all intersections at once
+                rows = np.array([self.node_index[i] for i in intersection_ids], dtype=np.intp)
+                closest, distance = nearest_idx(sign_lat, sign_lon, self.node_lats[rows], self.node_lons[rows],
+                                                float(self.INTERSECTION_THRESHOLD))
+                if closest != -1:
                     min_distance = distance
-                    closest_node_id = way_node_id
+                    closest_index = intersection_indexes[closest]
             # If min_distance is None, there are no intersections nearby
             # If min_distance is not None, there is an intersection nearby
             # If min_distance is less than INTERSECTION_THRESHOLD, we want to add
             # direction=forward or direction=backward
             if min_distance is not None and min_distance < self.INTERSECTION_THRESHOLD:
-                # Check if closest node_id is before or after node_id in parent way
+                # Check if closest intersection is before or after node_id in parent way
                 # If so, we want to add direction=forward
                 # If not, we want to add direction=backward
-                # Get index of node_id in parent way
-                index = ways_nodes.index(node_id)
-                # Get index of closest_node_id in parent way
-                closest_index = ways_nodes.index(closest_node_id)
-                if closest_index > index:
+                if closest_index > sign_index:
                     direction = 'forward'
                 else:
                     direction = 'backward'
-                node.attrib['action'] = 'modify'
-                direction_tag = ET.SubElement(node, 'tag')
-                direction_tag.attrib['k'] = 'direction'
-                direction_tag.attrib['v'] = direction
-                print(f"Added direction={direction} to node {node_id}")
-                self.direction_near_intersection_count += 1
+                return node_id, FixType.DIRECTION_NEAR_INTERSECTION, ('direction', direction)
             else:
-                print(f"Warning: node {node_id} is not near an intersection")
+                logger.warning("Warning: node %d is not near an intersection", node_id)
+        return node_id, FixType.NONE, None
+
+    # Apply a fix found by find_fix() to the tree
+    def apply_fix(self, fix: SignFix) -> None:
+        node_id, fix_type, tag = fix
+        if fix_type == FixType.SKIPPED:
+            self.skipped_count += 1
+            return
+        if tag is None:
+            return
+        node = self.node_by_id[node_id]
+        if fix_type == FixType.ALLWAY_STOP:
+            self.mark_as_all_way_stop(node)
+            self.allway_stop_count += 1
+            logger.info("Marked node %d as all-way stop", node_id)
+            return
+        node.set('action', 'modify')
+        direction_tag = ET.SubElement(node, 'tag')
+        direction_tag.set('k', tag[0])
+        direction_tag.set('v', tag[1])
+        if fix_type == FixType.DIRECTION_ON_ONEWAY:
+            self.direction_on_oneway_count += 1
+        else:
+            self.direction_near_intersection_count += 1
+        logger.info("Added %s=%s to node %d", tag[0], tag[1], node_id)
 
-    def process(self):
+    # Process a single stop or yield sign
+    def process_sign(self, node_id: int, sign_type: SignType) -> None:
+        self.apply_fix(self.find_fix(node_id, sign_type))
+
+    def process(self, jobs: int = 1):
         if self.tree is None:
             raise Exception("No tree loaded")
 
-        for node in self.tree.findall('node'):
+        root = self.tree.getroot()
+        # Signs which already have stop=all or direction tags are already fixed
+        skip_ids = {int(node.get('id')) for node in FIXED_SIGN_NODES(root)}
+        signs: List[tuple[int, SignType]] = []
+        for node in SIGN_NODES(root):
+            node_id = int(node.get('id'))
+            if node_id in skip_ids:
+                continue
             sign_type = SignType.NONE
-            already_fixed = False
-            for tag in node.findall('tag'):
-                if tag.attrib['k'] == 'highway' and tag.attrib['v'] == 'stop':
-                    sign_type = SignType.STOP
-                elif tag.attrib['k'] == 'highway' and tag.attrib['v'] == 'give_way':
-                    sign_type = SignType.YIELD
-                if tag.attrib['k'] == 'stop' and tag.attrib['v'] == 'all':
-                    already_fixed = True
+            for tag in node.iterfind('tag'):
+                if tag.get('k') == 'highway':
+                    if tag.get('v') == 'stop':
+                        sign_type = SignType.STOP
+                    elif tag.get('v') == 'give_way':
+                        sign_type = SignType.YIELD
                     break
-                if tag.attrib['k'] == 'direction':
-                    already_fixed = True
-                    break
-            if already_fixed:
-                continue
-            if sign_type != SignType.NONE:
-                node_id = int(node.attrib['id'])
-                print(f"Found {self.print_sign_type(sign_type)} sign at node {node_id}")
+            signs.append((node_id, sign_type))
+
+        # Find intersections near all signs at once
+        self.nearby_intersections = self.find_nearby_intersections(
+            [node_id for node_id, _ in signs if node_id in self.node_index]
+        )
+
+        if jobs > 1 and 'fork' not in multiprocessing.get_all_start_methods():
+            logger.warning("Warning: worker processes need fork, which is not available on this platform; "
+                           "processing signs in a single process")
+            jobs = 1
+        if jobs > 1:
+            # Find fixes in forked worker processes, which share the loaded
+            # tree and indexes with this process instead of having them pickled.
+            # Fixes are applied to the tree here, since each worker has its own copy.
+            global _pool_fixer
+            _pool_fixer = self
+            # Flush output first so forked workers don't print it again
+            sys.stdout.flush()
+            chunk_size = max(1, math.ceil(len(signs) / (jobs * 4)))
+            chunks = [signs[i:i + chunk_size] for i in range(0, len(signs), chunk_size)]
+            pool = multiprocessing.get_context('fork').Pool(jobs)
+            try:
+                for fixes in pool.imap_unordered(_find_fixes, chunks):
+                    for fix in fixes:
+                        self.apply_fix(fix)
+            finally:
+                pool.close()
+                pool.join()
+                _pool_fixer = None
+        else:
+            for node_id, sign_type in signs:
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Found {self.print_sign_type(sign_type)} sign at node {node_id}")
                 self.process_sign(node_id, sign_type)
 
         print(f"Added {self.allway_stop_count} all-way stop signs")
@@ -290,12 +490,37 @@ class StopSignFixer:
         self.tree.write(self.output_file, encoding='utf-8', xml_declaration=True)
 
 
+# Fixer used by worker processes, which inherit it when they are forked
+_pool_fixer: Optional[StopSignFixer] = None
+
+
+# Find fixes for a list of signs in a worker process
+def _find_fixes(signs: List[tuple[int, SignType]]) -> List[SignFix]:
+    fixes = []
+    for node_id, sign_type in signs:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Found {StopSignFixer.print_sign_type(sign_type)} sign at node {node_id}")
+        fixes.append(_pool_fixer.find_fix(node_id, sign_type))
+    return fixes
+
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Fix stop and yield signs')
     parser.add_argument('input_file', type=str, help='input file')
     parser.add_argument('output_file', type=str, help='output file')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='number of worker processes')
+    parser.add_argument('-v', '--verbose', action='count', default=0,
+                        help='print each change made (-v) and each sign found (-vv)')
     args = parser.parse_args()
+    if args.verbose >= 2:
+        level = logging.DEBUG
+    elif args.verbose == 1:
+        level = logging.INFO
+    else:
+        level = logging.WARNING
+    logging.basicConfig(format='%(message)s', stream=sys.stdout)
+    logger.setLevel(level)
     fixer = StopSignFixer(args.input_file, args.output_file)
     fixer.load()
-    fixer.process()
+    fixer.process(args.jobs)
     fixer.save()